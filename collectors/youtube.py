@@ -5,24 +5,37 @@ Fetches recent videos from configured YouTube channels and stores them in Postgr
 Filters out YouTube Shorts (videos < 60 seconds).
 """
 
+import asyncio
+import io
 import os
-import re
 from datetime import datetime
 from typing import Dict, List, Optional
 
+import aiohttp
 import psycopg2
 import yaml
 from dotenv import load_dotenv
+
+try:
+    # libyaml-backed loader; much faster than the pure-Python fallback
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
 from googleapiclient.discovery import build
 
 # Load environment variables
 load_dotenv()
 
+YOUTUBE_API_BASE = 'https://www.googleapis.com/youtube/v3'
+
+# Cap on concurrent playlistItems requests, to stay friendly to API rate limits
+MAX_CONCURRENT_REQUESTS = 10
+
 
 def load_channels() -> List[str]:
     """Load channel IDs from channels.yaml."""
     with open('channels.yaml', 'r') as f:
-        config = yaml.safe_load(f)
+        config = yaml.load(f, Loader=SafeLoader)
     return config['channels']
 
 
@@ -41,19 +54,31 @@ def parse_duration(duration: str) -> Optional[int]:
     """
     Parse ISO 8601 duration (e.g., PT15M33S) to seconds.
     Returns None if parsing fails.
-    """
-    if not duration:
-        return None
 
-    match = re.match(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', duration)
-    if not match:
+    YouTube only ever emits the PT[nH][nM][nS] subset, so a single pass
+    over the string beats a general-purpose regex here.
+    """
+    if not duration or len(duration) < 3 or duration[0] != 'P' or duration[1] != 'T':
         return None
 
-    hours = int(match.group(1) or 0)
-    minutes = int(match.group(2) or 0)
-    seconds = int(match.group(3) or 0)
+    total = 0
+    num = 0
+    for ch in duration[2:]:
+        if '0' <= ch <= '9':
+            num = num * 10 + (ord(ch) - 48)
+        elif ch == 'H':
+            total += num * 3600
+            num = 0
+        elif ch == 'M':
+            total += num * 60
+            num = 0
+        elif ch == 'S':
+            total += num
+            num = 0
+        else:
+            return None
 
-    return hours * 3600 + minutes * 60 + seconds
+    return total
 
 
 def get_channel_name(youtube, channel_id: str) -> str:
@@ -78,80 +103,148 @@ def get_channel_uploads_playlist_id(channel_id: str) -> str:
     return 'UU' + channel_id[2:]
 
 
-def fetch_channel_videos(youtube, channel_id: str, channel_name: str, max_results: int = 20) -> List[Dict]:
+async def fetch_channel_video_ids(session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                  channel_id: str, api_key: str, max_results: int = 20) -> List[str]:
     """
-    Fetch recent videos from a YouTube channel.
+    Fetch the IDs of a channel's most recent uploads via the REST endpoint.
 
     Args:
-        youtube: YouTube API client
+        session: Shared aiohttp session
+        semaphore: Concurrency limiter shared across requests
         channel_id: YouTube channel ID
-        channel_name: Human-readable channel name
+        api_key: YouTube Data API key
         max_results: Maximum number of videos to fetch
 
     Returns:
-        List of video dictionaries with metadata
+        List of video IDs
     """
-    uploads_playlist_id = get_channel_uploads_playlist_id(channel_id)
-    videos = []
+    params = {
+        'part': 'contentDetails',
+        'playlistId': get_channel_uploads_playlist_id(channel_id),
+        'maxResults': max_results,
+        'key': api_key
+    }
 
-    # Fetch playlist items (recent uploads)
-    playlist_request = youtube.playlistItems().list(
-        part='contentDetails',
-        playlistId=uploads_playlist_id,
-        maxResults=max_results
-    )
-    playlist_response = playlist_request.execute()
+    async with semaphore:
+        async with session.get(f'{YOUTUBE_API_BASE}/playlistItems', params=params) as response:
+            response.raise_for_status()
+            data = await response.json()
 
-    video_ids = [item['contentDetails']['videoId'] for item in playlist_response.get('items', [])]
+    return [item['contentDetails']['videoId'] for item in data.get('items', [])]
 
-    if not video_ids:
-        return videos
 
-    # Fetch video details (duration, title, description, etc.)
-    videos_request = youtube.videos().list(
-        part='snippet,contentDetails',
-        id=','.join(video_ids)
-    )
-    videos_response = videos_request.execute()
+async def fetch_all_video_ids(channel_ids: List[str], api_key: str) -> List:
+    """
+    Fetch recent upload IDs for all channels concurrently.
 
-    for video in videos_response.get('items', []):
-        snippet = video['snippet']
-        content_details = video['contentDetails']
+    Returns one result per channel, in input order; a result is either a
+    list of video IDs or the exception raised for that channel.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
 
-        duration_seconds = parse_duration(content_details['duration'])
+    async with aiohttp.ClientSession() as session:
+        tasks = [
+            fetch_channel_video_ids(session, semaphore, channel_id, api_key)
+            for channel_id in channel_ids
+        ]
+        return await asyncio.gather(*tasks, return_exceptions=True)
 
-        # Filter out shorts (< 60 seconds)
-        if duration_seconds and duration_seconds < 60:
-            continue
 
-        video_data = {
-            'video_id': video['id'],
-            'title': snippet['title'],
-            'url': f"https://www.youtube.com/watch?v={video['id']}",
-            'description': snippet.get('description', ''),
-            'thumbnail': snippet['thumbnails'].get('high', {}).get('url', ''),
-            'published_at': snippet['publishedAt'],
-            'channel_name': channel_name,
-            'duration_seconds': duration_seconds
-        }
-        videos.append(video_data)
+def fetch_video_details(youtube, video_channels: Dict[str, str]) -> List[Dict]:
+    """
+    Fetch metadata for a set of videos, batching up to 50 IDs per API call.
+
+    Args:
+        youtube: YouTube API client
+        video_channels: Mapping of video ID -> channel name
+
+    Returns:
+        List of video dictionaries with metadata
+    """
+    videos = []
+    video_ids = list(video_channels)
+
+    # videos.list accepts up to 50 IDs per call, so one request covers
+    # several channels' worth of uploads at once
+    for i in range(0, len(video_ids), 50):
+        chunk = video_ids[i:i + 50]
+
+        videos_request = youtube.videos().list(
+            part='snippet,contentDetails',
+            id=','.join(chunk)
+        )
+        videos_response = videos_request.execute()
+
+        for video in videos_response.get('items', []):
+            snippet = video['snippet']
+            content_details = video['contentDetails']
+
+            duration_seconds = parse_duration(content_details['duration'])
+
+            # Filter out shorts (< 60 seconds)
+            if duration_seconds and duration_seconds < 60:
+                continue
+
+            video_data = {
+                'video_id': video['id'],
+                'title': snippet['title'],
+                'url': f"https://www.youtube.com/watch?v={video['id']}",
+                'description': snippet.get('description', ''),
+                'thumbnail': snippet['thumbnails'].get('high', {}).get('url', ''),
+                'published_at': datetime.fromisoformat(snippet['publishedAt']),
+                'channel_name': video_channels[video['id']],
+                'duration_seconds': duration_seconds
+            }
+            videos.append(video_data)
 
     return videos
 
 
-def insert_video(conn, video: Dict) -> bool:
+def _copy_escape(value) -> str:
+    """
+    Escape a value for COPY text format. None becomes the NULL marker,
+    so empty strings stay empty strings (CSV would conflate the two).
+    """
+    if value is None:
+        return r'\N'
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def insert_videos(conn, videos: List[Dict]) -> int:
     """
-    Insert video into database. Returns True if inserted, False if duplicate.
+    Bulk-load a batch of videos via COPY into a temp staging table, then
+    merge into content. Duplicates (unique URL constraint) are skipped
+    server-side. Returns the number of new rows.
     """
+    if not videos:
+        return 0
+
     cursor = conn.cursor()
 
-    try:
-        cursor.execute('''
-            INSERT INTO content (
-                title, url, source_type, source_name, description,
-                thumbnail, published_at, estimated_duration
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        ''', (
+    # Skip URLs we already have before shipping any row data; the merge's
+    # ON CONFLICT below stays as a guard against concurrent collectors
+    cursor.execute(
+        'SELECT url FROM content WHERE url = ANY(%s)',
+        ([video['url'] for video in videos],)
+    )
+    existing = {row[0] for row in cursor.fetchall()}
+    new_videos = [video for video in videos if video['url'] not in existing]
+
+    if not new_videos:
+        cursor.close()
+        return 0
+
+    # COPY doesn't support ON CONFLICT, so load into a staging table first
+    # and merge from there
+    buf = io.StringIO()
+    for video in new_videos:
+        buf.write('\t'.join(_copy_escape(value) for value in (
             video['title'],
             video['url'],
             'youtube',
@@ -160,13 +253,33 @@ def insert_video(conn, video: Dict) -> bool:
             video['thumbnail'],
             video['published_at'],
             video['duration_seconds']
-        ))
+        )) + '\n')
+    buf.seek(0)
+
+    try:
+        cursor.execute('''
+            CREATE TEMP TABLE stage (LIKE content INCLUDING DEFAULTS) ON COMMIT DROP
+        ''')
+        cursor.copy_expert('''
+            COPY stage (
+                title, url, source_type, source_name, description,
+                thumbnail, published_at, estimated_duration
+            ) FROM STDIN
+        ''', buf)
+        cursor.execute('''
+            INSERT INTO content (
+                title, url, source_type, source_name, description,
+                thumbnail, published_at, estimated_duration
+            )
+            SELECT title, url, source_type, source_name, description,
+                   thumbnail, published_at, estimated_duration
+            FROM stage
+            ON CONFLICT (url) DO NOTHING
+            RETURNING url
+        ''')
+        new_count = len(cursor.fetchall())
         conn.commit()
-        return True
-    except psycopg2.IntegrityError:
-        # Video already exists (unique URL constraint)
-        conn.rollback()
-        return False
+        return new_count
     finally:
         cursor.close()
 
@@ -182,7 +295,9 @@ def main():
         print("Please copy .env.example to .env and add your API key")
         return
 
-    youtube = build('youtube', 'v3', developerKey=api_key)
+    # static_discovery uses the discovery document bundled with the client
+    # library, skipping an HTTPS fetch + JSON parse on every run
+    youtube = build('youtube', 'v3', developerKey=api_key, static_discovery=True)
 
     # Load channels
     try:
@@ -201,32 +316,32 @@ def main():
         print("Make sure PostgreSQL is running: docker-compose up -d postgres")
         return
 
-    # Process each channel
-    total_new = 0
-    total_skipped = 0
+    # Phase 1: fetch every channel's recent uploads concurrently
+    results = asyncio.run(fetch_all_video_ids(channels, api_key))
+
+    video_channels = {}
 
-    for channel_id in channels:
+    for channel_id, result in zip(channels, results):
         # Fetch channel name from YouTube API
         channel_name = get_channel_name(youtube, channel_id)
 
         print(f"📡 Processing: {channel_name}")
 
-        try:
-            videos = fetch_channel_videos(youtube, channel_id, channel_name)
+        if isinstance(result, Exception):
+            print(f"   ❌ Error processing {channel_name}: {result}")
+            continue
 
-            new_count = 0
-            for video in videos:
-                if insert_video(conn, video):
-                    new_count += 1
+        for video_id in result:
+            video_channels[video_id] = channel_name
 
-            skipped_count = len(videos) - new_count
-            total_new += new_count
-            total_skipped += skipped_count
+        print(f"   ✅ Found {len(result)} recent uploads")
 
-            print(f"   ✅ Added {new_count} new videos, skipped {skipped_count} duplicates")
+    # Phase 2: fetch details for all channels' videos in batches of 50,
+    # then insert everything in one round-trip
+    videos = fetch_video_details(youtube, video_channels)
 
-        except Exception as e:
-            print(f"   ❌ Error processing {channel_name}: {e}")
+    total_new = insert_videos(conn, videos)
+    total_skipped = len(videos) - total_new
 
     conn.close()
 
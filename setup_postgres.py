@@ -1,45 +1,85 @@
+import argparse
 import os
+
 import psycopg2
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Connect to PostgreSQL
-conn = psycopg2.connect(
-    host=os.getenv("DB_HOST"),
-    port=os.getenv("DB_PORT"),
-    database=os.getenv("DB_NAME"),
-    user=os.getenv("DB_USER"),
-    password=os.getenv("DB_PASSWORD")
-)
-
-cursor = conn.cursor()
-
-# Create table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS content (
-    id SERIAL PRIMARY KEY,
-    title TEXT NOT NULL,
-    url TEXT UNIQUE NOT NULL,
-    source_type TEXT,
-    source_name TEXT,
-    description TEXT,
-    thumbnail TEXT,
-    published_at TIMESTAMP,
-    collected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    consumed BOOLEAN DEFAULT FALSE,
-    score INTEGER DEFAULT 0,
-    estimated_duration INTEGER
-)
-''')
-
-# Create indexes
-cursor.execute('CREATE INDEX IF NOT EXISTS idx_consumed ON content(consumed)')
-cursor.execute('CREATE INDEX IF NOT EXISTS idx_source_type ON content(source_type)')
-cursor.execute('CREATE INDEX IF NOT EXISTS idx_published_at ON content(published_at DESC)')
-
-conn.commit()
-conn.close()
-
-print("✅ PostgreSQL table created successfully!")
\ No newline at end of file
+
+def main():
+    parser = argparse.ArgumentParser(description='Create the content table and indexes.')
+    parser.add_argument(
+        '--unlogged', action='store_true',
+        help='create the table UNLOGGED (skips WAL, 2-3x faster bulk loads); '
+             'run ALTER TABLE content SET LOGGED once the backfill is done'
+    )
+    args = parser.parse_args()
+
+    # Connect to PostgreSQL
+    conn = psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD")
+    )
+
+    cursor = conn.cursor()
+
+    # Create table; all DDL below runs in one transaction and commits once
+    table = 'UNLOGGED TABLE' if args.unlogged else 'TABLE'
+    cursor.execute(f'''
+    CREATE {table} IF NOT EXISTS content (
+        id SERIAL PRIMARY KEY,
+        title TEXT NOT NULL,
+        url TEXT UNIQUE NOT NULL,
+        source_type TEXT,
+        source_name TEXT,
+        description TEXT,
+        thumbnail TEXT,
+        published_at TIMESTAMPTZ,
+        collected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        consumed BOOLEAN DEFAULT FALSE,
+        score INTEGER DEFAULT 0,
+        estimated_duration INTEGER
+    )
+    ''')
+
+    # Upgrade older installs that created published_at without a time zone
+    cursor.execute('''
+    SELECT data_type FROM information_schema.columns
+    WHERE table_name = 'content' AND column_name = 'published_at'
+    ''')
+    if cursor.fetchone()[0] == 'timestamp without time zone':
+        cursor.execute('''
+        ALTER TABLE content ALTER COLUMN published_at
+        TYPE TIMESTAMPTZ USING published_at AT TIME ZONE 'UTC'
+        ''')
+
+    # Create indexes
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_source_type ON content(source_type)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_published_at ON content(published_at DESC)')
+
+    # Partial index for the viewer's default "unconsumed" view: gives an
+    # ordered index scan instead of a full scan + sort
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_unconsumed_pub
+    ON content(published_at DESC) WHERE consumed = FALSE
+    ''')
+
+    # The old boolean index is too low-selectivity to help; drop it on
+    # existing installs
+    cursor.execute('DROP INDEX IF EXISTS idx_consumed')
+
+    conn.commit()
+    conn.close()
+
+    print("✅ PostgreSQL table created successfully!")
+    if args.unlogged:
+        print("⚠️  Table is UNLOGGED — run ALTER TABLE content SET LOGGED after the backfill")
+
+
+if __name__ == '__main__':
+    main()
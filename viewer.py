@@ -4,19 +4,27 @@ A simple Streamlit app to browse collected content and mark items as consumed.
 """
 
 import os
+import weakref
+
+import requests
 import streamlit as st
-import psycopg2
-from datetime import datetime
-import pandas as pd
+from psycopg2 import errors
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import SimpleConnectionPool
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Items per page in the content list
+PAGE_SIZE = 50
 
-def get_connection():
-    """Create database connection."""
-    return psycopg2.connect(
+
+@st.cache_resource
+def get_pool():
+    """Create the shared connection pool (one per Streamlit server)."""
+    return SimpleConnectionPool(
+        1, 10,
         host=os.getenv("DB_HOST"),
         port=os.getenv("DB_PORT"),
         database=os.getenv("DB_NAME"),
@@ -25,46 +33,126 @@ def get_connection():
     )
 
 
-def fetch_content(consumed_filter="all"):
-    """Fetch content from database with optional consumed filter."""
+@st.cache_resource
+def get_prepared_connections():
+    """Pooled connections that already have our statements prepared.
+
+    Lives in cache_resource so it survives Streamlit reruns alongside the
+    pool itself; a module-level set would reset every rerun.
+    """
+    return weakref.WeakSet()
+
+
+def get_connection():
+    """Check a connection out of the shared pool."""
+    return get_pool().getconn()
+
+
+def put_connection(conn):
+    """Return a connection to the shared pool."""
+    get_pool().putconn(conn)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_content(consumed_filter="all", page=1):
+    """Fetch one page of content as a list of dicts."""
     conn = get_connection()
-    cursor = conn.cursor()
-    
+
+    # Named cursor keeps the result set in a server-side portal and
+    # streams it in itersize blocks instead of buffering it client-side,
+    # which bounds memory even with a large PAGE_SIZE
+    cursor = conn.cursor(name='content_stream', cursor_factory=RealDictCursor)
+    cursor.itersize = 200
+
     query = """
-        SELECT id, title, url, source_type, source_name, 
-               description, thumbnail, published_at, collected_at, 
+        SELECT id, title, url, source_type, source_name,
+               CASE WHEN length(description) > 300
+                    THEN left(description, 300) || '...'
+                    ELSE description
+               END AS description,
+               thumbnail, published_at, collected_at,
                consumed, estimated_duration
         FROM content
     """
-    
+
     if consumed_filter == "unconsumed":
         query += " WHERE consumed = FALSE"
     elif consumed_filter == "consumed":
         query += " WHERE consumed = TRUE"
-    
-    query += " ORDER BY published_at DESC"
-    
-    cursor.execute(query)
-    columns = [desc[0] for desc in cursor.description]
-    rows = cursor.fetchall()
-    
-    conn.close()
-    
-    return pd.DataFrame(rows, columns=columns)
+
+    query += " ORDER BY published_at DESC, id DESC LIMIT %s OFFSET %s"
+
+    cursor.execute(query, (PAGE_SIZE, (page - 1) * PAGE_SIZE))
+    rows = list(cursor)
+
+    cursor.close()
+    put_connection(conn)
+
+    return rows
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_stats():
+    """Fetch sidebar aggregates in a single query."""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT count(*),
+               count(*) FILTER (WHERE consumed),
+               coalesce(sum(estimated_duration), 0)
+        FROM content
+    """)
+    total_count, consumed_count, total_duration = cursor.fetchone()
+
+    put_connection(conn)
+
+    return total_count, consumed_count, total_duration
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_thumb(url):
+    """Fetch thumbnail bytes, cached so reruns don't refetch them."""
+    response = requests.get(url, timeout=3)
+    response.raise_for_status()
+    return response.content
 
 
 def mark_as_consumed(content_id, consumed=True):
     """Mark content item as consumed or unconsumed."""
     conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "UPDATE content SET consumed = %s WHERE id = %s",
-        (consumed, content_id)
-    )
-    
-    conn.commit()
-    conn.close()
+    try:
+        cursor = conn.cursor()
+
+        # Pooled connections live across reruns, so prepare the UPDATE once
+        # per connection and skip the parse/plan step on later clicks
+        prepared = get_prepared_connections()
+        if conn not in prepared:
+            try:
+                cursor.execute(
+                    "PREPARE upd_consumed (bool, int) AS "
+                    "UPDATE content SET consumed = $1 WHERE id = $2"
+                )
+            except errors.DuplicatePreparedStatement:
+                # Session already has it (tracking state was rebuilt);
+                # clear the aborted transaction and carry on
+                conn.rollback()
+            prepared.add(conn)
+
+        # Don't wait on the WAL fsync for a single-row toggle; losing one
+        # click to a crash is an acceptable trade for a snappier UI
+        cursor.execute("SET LOCAL synchronous_commit = OFF")
+        cursor.execute("EXECUTE upd_consumed (%s, %s)", (consumed, content_id))
+
+        conn.commit()
+    finally:
+        # putconn rolls back any aborted transaction, so errors above
+        # can't leak a broken connection out of the pool
+        put_connection(conn)
+
+    # Drop cached query results so the list and stats reflect the change
+    fetch_content.clear()
+    fetch_stats.clear()
 
 
 # Streamlit app configuration
@@ -105,23 +193,27 @@ consumed_filter = st.sidebar.radio(
     ["all", "unconsumed", "consumed"],
     index=1  # Default to unconsumed
 )
+page = st.sidebar.number_input("Page", min_value=1, value=1, step=1)
 
 # Fetch and display content
-df = fetch_content(consumed_filter)
+rows = fetch_content(consumed_filter, page)
 
-if df.empty:
+if not rows:
     st.info("No content found. Check your n8n workflows are running!")
 else:
-    st.write(f"**{len(df)} items**")
-    
+    st.write(f"**{len(rows)} items** (page {page})")
+
     # Display each item
-    for idx, row in df.iterrows():
+    for row in rows:
         col1, col2, col3 = st.columns([1, 3, 1])
         
         with col1:
             # Thumbnail
             if row['thumbnail']:
-                st.image(row['thumbnail'], use_container_width=True)
+                try:
+                    st.image(load_thumb(row['thumbnail']), use_container_width=True)
+                except requests.RequestException:
+                    st.write("🎥")
             else:
                 st.write("🎥")
         
@@ -140,12 +232,9 @@ else:
                 unsafe_allow_html=True
             )
             
-            # Description
+            # Description (already truncated in the query)
             if row['description']:
-                description = row['description']
-                if len(description) > 300:
-                    description = description[:300] + "..."
-                st.write(description)
+                st.write(row['description'])
         
         with col3:
             # Consumed toggle button
@@ -165,18 +254,13 @@ else:
 # Stats in sidebar
 st.sidebar.markdown("---")
 st.sidebar.subheader("📊 Stats")
-total_df = fetch_content("all")
-if not total_df.empty:
-    total_count = len(total_df)
-    consumed_count = total_df['consumed'].sum()
-    unconsumed_count = total_count - consumed_count
-    
+total_count, consumed_count, total_duration = fetch_stats()
+if total_count:
     st.sidebar.metric("Total Items", total_count)
     st.sidebar.metric("Watched", consumed_count)
-    st.sidebar.metric("To Watch", unconsumed_count)
-    
-    # Calculate total watch time
-    total_duration = total_df[total_df['estimated_duration'].notna()]['estimated_duration'].sum()
+    st.sidebar.metric("To Watch", total_count - consumed_count)
+
+    # Total watch time
     if total_duration > 0:
         hours = int(total_duration // 60)
         minutes = int(total_duration % 60)